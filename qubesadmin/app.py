@@ -22,6 +22,7 @@
 """
 Main Qubes() class and related classes.
 """
+import contextlib
 import grp
 import os
 import shlex
@@ -50,6 +51,9 @@ try:
 except ImportError:
     has_qubesdb = False
 
+#: size of a single read from qubesd socket
+BUF_SIZE = 65536
+
 
 class VMCollection:
     """Collection of VMs objects"""
@@ -58,16 +62,46 @@ class VMCollection:
         self.app = app
         self._vm_list = None
         self._vm_objects = {}
+        #: nesting level of :py:meth:`pinned` blocks
+        self._pinned = 0
+        #: :py:meth:`clear_cache` was called while the list was pinned
+        self._clear_pending = False
 
     def clear_cache(self, invalidate_name=None):
         """Clear cached list of VMs
         If *invalidate_name* is given, remove that object from cache
         explicitly too.
+
+        If the list is pinned (see :py:meth:`pinned`), it is cleared only
+        after leaving the outermost pinned block.
         """
-        self._vm_list = None
+        if self._pinned:
+            self._clear_pending = True
+        else:
+            self._vm_list = None
         if invalidate_name:
             self._vm_objects.pop(invalidate_name, None)
 
+    @contextlib.contextmanager
+    def pinned(self):
+        """Keep cached list of VMs for the duration of the `with` block.
+
+        The list is retrieved (if not cached already) when entering the block,
+        and any :py:meth:`clear_cache` call made inside is deferred until
+        leaving it. This is meant for bulk, read-only operations (possibly
+        running in multiple threads), which should not re-download the list
+        in the middle.
+        """
+        self.refresh_cache()
+        self._pinned += 1
+        try:
+            yield self
+        finally:
+            self._pinned -= 1
+            if not self._pinned and self._clear_pending:
+                self._clear_pending = False
+                self._vm_list = None
+
     def refresh_cache(self, force=False):
         """Refresh cached list of VMs"""
         if not force and self._vm_list is not None:
@@ -75,12 +109,11 @@ class VMCollection:
         vm_list_data = self.app.qubesd_call("dom0", "admin.vm.List")
         new_vm_list = {}
         # FIXME: this will probably change
-        for vm_data in vm_list_data.splitlines():
-            vm_name, props = vm_data.decode("ascii").split(" ", 1)
-            vm_name = str(vm_name)
-            props = props.split(" ")
+        for vm_data in vm_list_data.decode("ascii").splitlines():
+            vm_name, _, props = vm_data.partition(" ")
+            # str.split() is measurably faster than re.findall() here
             new_vm_list[vm_name] = dict(
-                [vm_prop.split("=", 1) for vm_prop in props]
+                [vm_prop.split("=", 1) for vm_prop in props.split(" ")]
             )
             # if cache not enabled, drop power state
             if not self.app.cache_enabled:
@@ -154,6 +187,10 @@ class VMCollection:
         for vm in sorted(self._vm_list):
             yield self[vm]
 
+    def __len__(self):
+        self.refresh_cache()
+        return len(self._vm_list)
+
     def keys(self):
         """Get list of VM names."""
         self.refresh_cache()
@@ -860,6 +897,9 @@ class QubesLocal(QubesBase):
             )
             return self._parse_qubesd_response(stdout)
 
+        # qubesd handles exactly one call per connection - both the request
+        # and the response are terminated by EOF - so the connection cannot
+        # be kept open and reused for subsequent calls
         try:
             client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
             client_socket.connect(qubesadmin.config.QUBESD_SOCKET)
@@ -868,15 +908,42 @@ class QubesLocal(QubesBase):
                 "Failed to connect to qubesd service: %s", str(e)
             )
 
-        call_header = "{}+{} dom0 name {}\0".format(method, arg or "", dest)
-        client_socket.sendall(call_header.encode("ascii"))
-        if payload is not None:
-            client_socket.sendall(payload)
+        call_header = "{}+{} dom0 name {}\0".format(
+            method, arg or "", dest
+        ).encode("ascii")
+        if not payload:
+            client_socket.sendall(call_header)
+        elif len(payload) < BUF_SIZE:
+            client_socket.sendall(call_header + payload)
+        else:
+            # send both in one syscall, without copying (large) payload
+            sent = client_socket.sendmsg([call_header, payload])
+            if sent < len(call_header):
+                client_socket.sendall(call_header[sent:])
+                sent = len(call_header)
+            client_socket.sendall(memoryview(payload)[sent - len(call_header):])
 
         client_socket.shutdown(socket.SHUT_WR)
 
-        return_data = client_socket.makefile("rb").read()
+        # receive directly into a single buffer (growing it as needed),
+        # instead of allocating separate chunks and then joining them
+        buf = bytearray(BUF_SIZE)
+        view = memoryview(buf)
+        size = 0
+        while True:
+            received = client_socket.recv_into(view[size:])
+            if not received:
+                break
+            size += received
+            if size == len(buf):
+                # buffer can't be resized while there is a view on it
+                view.release()
+                buf.extend(bytes(len(buf)))
+                view = memoryview(buf)
+        view.release()
         client_socket.close()
+        del buf[size:]
+        return_data = bytes(buf)
         return self._parse_qubesd_response(return_data)
 
     def run_service(
@@ -1010,6 +1077,10 @@ class QubesRemote(QubesBase):
         service_name = method
         if arg is not None:
             service_name += "+" + arg
+        # Each call needs a separate qrexec-client-vm process: qrexec policy
+        # is evaluated per service call (including its argument and target),
+        # so multiplexing several Admin API calls over a single long-lived
+        # qrexec connection would bypass it.
         command = [qubesadmin.config.QREXEC_CLIENT_VM, dest, service_name]
         if payload_stream:
             (p, stdout, stderr) = self._call_with_stream(
@@ -186,6 +186,45 @@ class TC_00_VMCollection(qubesadmin.tests.QubesTestCase):
         self.assertIsNot(vm1, vm4)
         self.assertAllCalled()
 
+    def test_013_pinned(self):
+        self.app.expected_calls[('dom0', 'admin.vm.List', None, None)] = \
+            b'0\x00test-vm class=AppVM state=Running\n'
+        with self.app.domains.pinned():
+            self.assertAllCalled()
+            self.app.actual_calls = []
+            self.app.domains.clear_cache()
+            with self.app.domains.pinned():
+                self.app.domains.clear_cache()
+            self.assertIn('test-vm', self.app.domains)
+            self.assertEqual(self.app.actual_calls, [])
+        # deferred clear_cache() takes effect now
+        self.app.expected_calls[('dom0', 'admin.vm.List', None, None)] = \
+            b'0\x00test-vm2 class=AppVM state=Running\n'
+        self.assertNotIn('test-vm', self.app.domains)
+        self.assertIn('test-vm2', self.app.domains)
+        self.assertAllCalled()
+
+    def test_014_list_props(self):
+        self.app.expected_calls[('dom0', 'admin.vm.List', None, None)] = \
+            b'0\x00test-vm class=AppVM state=Running extra=a=b empty=\n' \
+            b'test-vm2 class=TemplateVM state=Halted\n'
+        self.app.domains.refresh_cache()
+        # pylint: disable=protected-access
+        self.assertEqual(self.app.domains._vm_list, {
+            'test-vm': {'class': 'AppVM', 'extra': 'a=b', 'empty': ''},
+            'test-vm2': {'class': 'TemplateVM'},
+        })
+        self.assertAllCalled()
+
+    def test_015_len(self):
+        self.app.expected_calls[('dom0', 'admin.vm.List', None, None)] = \
+            b'0\x00test-vm class=AppVM state=Running\n' \
+            b'test-vm2 class=AppVM state=Running\n'
+        self.assertEqual(len(self.app.domains), 2)
+        # pylint: disable=protected-access
+        self.assertEqual(self.app.domains._vm_objects, {})
+        self.assertAllCalled()
+
 
 
 class TC_10_QubesBase(qubesadmin.tests.QubesTestCase):
@@ -1041,6 +1080,28 @@ class TC_20_QubesLocal(unittest.TestCase):
         with open(self.tmpdir + '/payload', 'rb') as payload_f:
             self.assertEqual(payload_f.read(), expected)
 
+    def test_006_qubesd_call_large_response(self):
+        data = b'x' * (qubesadmin.app.BUF_SIZE * 3 + 123)
+        self.listen_and_send(b'0\0' + data)
+        value = self.app.qubesd_call('test-vm', 'some.method', None, None)
+        self.assertEqual(value, data)
+        self.assertEqual(self.get_request(),
+            b'some.method+ dom0 name test-vm\0')
+
+    def test_007_qubesd_call_large_payload(self):
+        payload = b'y' * (qubesadmin.app.BUF_SIZE * 3 + 123)
+        self.listen_and_send(b'0\0')
+        self.app.qubesd_call('test-vm', 'some.method', 'arg1', payload)
+        self.assertEqual(self.get_request(),
+            b'some.method+arg1 dom0 name test-vm\0' + payload)
+
+    def test_008_qubesd_call_response_buffer_size(self):
+        # response filling the receive buffer exactly
+        data = b'x' * (qubesadmin.app.BUF_SIZE * 2 - 2)
+        self.listen_and_send(b'0\0' + data)
+        value = self.app.qubesd_call('test-vm', 'some.method', None, None)
+        self.assertEqual(value, data)
+
     @mock.patch('os.isatty', lambda fd: fd == 2)
     def test_010_run_service(self):
         self.listen_and_send(b'0\0')
@@ -149,3 +149,17 @@ class TC_01_SinglePropertyAction(qubesadmin.tests.QubesTestCase):
         args = parser.parse_args(['testvalue'])
         self.assertIn(
             ('testprop', 'testvalue'), args.properties.items())
+
+
+class TC_02_VmNameAction(qubesadmin.tests.QubesTestCase):
+    def test_000_wildcard(self):
+        self.app.expected_calls[('dom0', 'admin.vm.List', None, None)] = \
+            b'0\x00test-vm1 class=AppVM state=Running\n' \
+            b'test-vm2 class=AppVM state=Running\n' \
+            b'other-vm class=AppVM state=Running\n'
+        parser = qubesadmin.tools.QubesArgumentParser(
+            vmname_nargs='+', version='')
+        args = parser.parse_args(['test-vm*', 'other-vm'], app=self.app)
+        self.assertEqual(sorted(vm.name for vm in args.domains),
+            ['other-vm', 'test-vm1', 'test-vm2'])
+        self.assertAllCalled()
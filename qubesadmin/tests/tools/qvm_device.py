@@ -211,6 +211,62 @@ class TC_00_qvm_device(qubesadmin.tests.QubesTestCase):
                 ],
             )
 
+    def test_005_list_no_used_by(self):
+        """
+        List devices without checking to which qubes they are attached.
+        The device is attached to the `vm3`, but it is not listed.
+        """
+        self.expected_device_call('test-vm2', 'Available')
+        self.expected_device_call('test-vm3', 'Available')
+        self.expected_device_call('test-vm1', 'Attached')
+        self.expected_device_call('test-vm2', 'Attached')
+        self.expected_device_call(
+            'test-vm3', 'Attached',
+            b"0\0test-vm1+dev1 port_id='dev1' devclass='testclass' "
+            b"backend_domain='test-vm1' mode='required'\n"
+        )
+
+        with qubesadmin.tests.tools.StdoutBuffer() as buf:
+            qubesadmin.tools.qvm_device.main(
+                ['testclass', 'list', '--no-used-by'], app=self.app)
+            self.assertEqual(
+                [x.rstrip() for x in buf.getvalue().splitlines()],
+                ['test-vm1:dev1  Audio: itl test-device']
+            )
+        self.assertAllCalled()
+
+    def test_006_list_assignments_no_used_by(self):
+        """
+        List assigned devices without checking to which qubes they are
+        assigned.
+        """
+        self.expected_device_call('test-vm2', 'Available')
+        self.expected_device_call('test-vm3', 'Available')
+        self.expected_device_call('test-vm1', 'Attached')
+        self.expected_device_call('test-vm2', 'Attached')
+        self.expected_device_call('test-vm3', 'Attached')
+        self.expected_device_call('test-vm1', 'Assigned')
+        self.expected_device_call(
+            'test-vm2', 'Assigned',
+            b"0\0test-vm1+dev1 port_id='dev1' devclass='testclass' "
+            b"backend_domain='test-vm1' mode='required'\n"
+            b"test-vm3+dev3 device_id='0000:0000::p000000' port_id='dev3' "
+            b"devclass='testclass' backend_domain='test-vm3' mode='required'\n"
+        )
+        self.expected_device_call('test-vm3', 'Assigned')
+
+        with qubesadmin.tests.tools.StdoutBuffer() as buf:
+            qubesadmin.tools.qvm_device.main(
+                ['testclass', 'list', '--assignments', '--no-used-by'],
+                app=self.app)
+            self.assertEqual(
+                [x.rstrip() for x in buf.getvalue().splitlines()],
+                ['test-vm1:dev1  Audio: itl test-device',
+                 'test-vm1:dev1  any device',
+                 'test-vm3:dev3  0000:0000::p000000']
+            )
+        self.assertAllCalled()
+
     def test_010_attach(self):
         """ Test attach action """
         self.app.expected_calls[(
@@ -273,6 +329,35 @@ class TC_00_qvm_device(qubesadmin.tests.QubesTestCase):
                 stderr.getvalue())
         self.assertAllCalled()
 
+    def test_015_attach_device_info_cached(self):
+        """ Test that device info is retrieved only once """
+        self.app.expected_calls[(
+            'test-vm2', 'admin.vm.device.testclass.Attach',
+            'test-vm1+dev1+dead+beef+babe+u012345',
+            b"device_id='dead:beef:babe:u012345' port_id='dev1' "
+            b"devclass='testclass' backend_domain='test-vm1' mode='manual' "
+            b"frontend_domain='test-vm2'")] = b'0\0'
+        available_call = (
+            'test-vm1', 'admin.vm.device.testclass.Available', None, None)
+        self.vm1.devices.clear_cache()
+        calls_before = self.app.actual_calls.count(available_call)
+        qubesadmin.tools.qvm_device.main(
+            ['testclass', 'attach', 'test-vm2', 'test-vm1:dev1'], app=self.app)
+        self.assertEqual(
+            self.app.actual_calls.count(available_call) - calls_before, 1)
+        self.assertAllCalled()
+
+    def test_016_attach_invalid_option(self):
+        """ Test attach action with malformed option """
+        with qubesadmin.tests.tools.StderrBuffer() as stderr:
+            retcode = qubesadmin.tools.qvm_device.main(
+                ['testclass', 'attach', '-o', 'no-value', 'test-vm2',
+                 'test-vm1:dev1'],
+                app=self.app)
+            self.assertEqual(retcode, 1)
+            self.assertIn("Invalid option 'no-value'", stderr.getvalue())
+        self.assertAllCalled()
+
     def test_020_detach(self):
         """ Test detach action """
         self.app.expected_calls[
@@ -551,6 +636,17 @@ class TC_00_qvm_device(qubesadmin.tests.QubesTestCase):
             self.assertIn('Warning:', buf.getvalue())
         self.assertAllCalled()
 
+    def test_042_assign_invalid_option(self):
+        """ Test assign action with malformed option """
+        with qubesadmin.tests.tools.StderrBuffer() as stderr:
+            retcode = qubesadmin.tools.qvm_device.main(
+                ['testclass', 'assign', '-o', 'no-value', 'test-vm2',
+                 'test-vm1:dev1'],
+                app=self.app)
+            self.assertEqual(retcode, 1)
+            self.assertIn("Invalid option 'no-value'", stderr.getvalue())
+        self.assertAllCalled()
+
     def test_050_unassign(self):
         """ Test unassign action """
         self.app.expected_calls[
@@ -666,3 +762,18 @@ class TC_00_qvm_device(qubesadmin.tests.QubesTestCase):
                           'device ID: dead:beef:babe:u012345',
                           buf.getvalue())
         self.assertAllCalled()
+
+    def test_070_parser_reused(self):
+        """ Test that the parser is created once per device class """
+        parser = qubesadmin.tools.qvm_device.get_parser('testclass')
+        self.assertIs(
+            qubesadmin.tools.qvm_device.get_parser('testclass'), parser)
+        self.assertIsNot(qubesadmin.tools.qvm_device.get_parser(), parser)
+        # parsing doesn't leak values to subsequent calls
+        args = parser.parse_args(
+            ['attach', '-o', 'opt=1', 'test-vm2', 'test-vm1:dev1'],
+            app=self.app)
+        self.assertEqual(args.option, ['opt=1'])
+        args = parser.parse_args(
+            ['attach', 'test-vm2', 'test-vm1:dev1'], app=self.app)
+        self.assertIsNone(args.option)
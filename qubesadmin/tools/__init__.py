@@ -26,7 +26,6 @@ from __future__ import print_function
 import argparse
 import fnmatch
 import importlib
-import importlib.metadata
 import logging
 import os
 import subprocess
@@ -194,9 +193,10 @@ class VmNameAction(QubesAction):
                 destinations = set()
                 for destination in getattr(namespace, self.dest):
                     if any(wildcard in destination for wildcard in '*?[!]'):
-                        for domain in app.domains:
-                            if fnmatch.fnmatch(domain.name, destination):
-                                destinations.add(domain.name)
+                        # match just names, don't create VM objects of
+                        # all the domains
+                        destinations.update(
+                            fnmatch.filter(app.domains.keys(), destination))
                     else:
                         destinations.add(destination)
 
@@ -357,7 +357,10 @@ class QubesArgumentParser(argparse.ArgumentParser):
         if version is not None:
             self.version = version
         else:
-            _metadata_ = importlib.metadata.metadata('qubesadmin')
+            # imported only here, as it is slow to load and not needed
+            # by code paths which don't build a parser
+            from importlib import metadata
+            _metadata_ = metadata.metadata('qubesadmin')
             self.version = '{} ({}) {}'.format(os.path.basename(sys.argv[0]), \
                 _metadata_['summary'], _metadata_['version'])
             self.version += '\nCopyright (C) {}'.format(_metadata_['author'])
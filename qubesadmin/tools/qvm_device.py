@@ -25,6 +25,7 @@
 """Qubes volume and block device management"""
 
 import argparse
+import concurrent.futures
 import os
 import sys
 
@@ -42,6 +43,10 @@ from qubesadmin.device_protocol import (
     ProtocolError,
 )
 
+#: number of threads used to query qubesd about devices of different qubes
+#: concurrently; each listing is a separate (blocking) Admin API call
+LIST_WORKERS = 32
+
 
 def prepare_table(dev_list, with_sbdf=False):
     """Converts a list of :py:class:`qubes.devices.DeviceInfo` objects to a
@@ -65,22 +70,11 @@ def prepare_table(dev_list, with_sbdf=False):
 
     for line in dev_list:
         if with_sbdf:
-            output += [
-                (
-                    line.ident,
-                    line.sbdf,
-                    line.description,
-                    str(line.assignments),
-                )
-            ]
+            output.append(
+                (line.ident, line.sbdf, line.description, line.assignments)
+            )
         else:
-            output += [
-                (
-                    line.ident,
-                    line.description,
-                    str(line.assignments),
-                )
-            ]
+            output.append((line.ident, line.description, line.assignments))
 
     return header + sorted(output)
 
@@ -111,30 +105,55 @@ def list_devices(args):
     domains = args.domains if hasattr(args, "domains") else None
     if args.devclass != "pci":
         args.with_sbdf = False
-    lines = _load_lines(args.app, domains, args.devclass, actual_devices=True)
-    lines = list(lines.values())
-    # short command without (list/ls) should print just existing devices
-    # short command is not a great place for introducing listing specific flags
-    if getattr(args, "assignments", False):
-        # we need to check assignments for all domains since
-        # selected vm can be mentioned there as backend
-        extra_lines = _load_lines(
-            args.app, [], args.devclass, actual_devices=False
+    with_frontends = not getattr(args, "no_used_by", False)
+    # don't let the worker threads re-download the list of qubes
+    with args.app.domains.pinned():
+        lines = _load_lines(
+            args.app,
+            domains,
+            args.devclass,
+            actual_devices=True,
+            with_frontends=with_frontends,
         )
-        lines += list(extra_lines.values())
+        lines = list(lines.values())
+        # short command without (list/ls) should print just existing devices
+        # short command is not a great place for introducing listing
+        # specific flags
+        if getattr(args, "assignments", False):
+            # we need to check assignments for all domains since
+            # selected vm can be mentioned there as backend
+            extra_lines = _load_lines(
+                args.app,
+                [],
+                args.devclass,
+                actual_devices=False,
+                with_frontends=with_frontends,
+            )
+            lines += list(extra_lines.values())
     qubesadmin.tools.print_table(
         prepare_table(lines, with_sbdf=getattr(args, "with_sbdf", False))
     )
 
 
-def _load_lines(app, domains, devclass, actual_devices: bool):
+def _load_lines(
+    app, domains, devclass, actual_devices: bool, with_frontends: bool = True
+):
     # pylint: disable=missing-function-docstring
     devices = _load_devices(app, domains, devclass, actual_devices)
     result = {dev: Line(dev, not actual_devices) for dev in devices}
-    for dev in result:
-        for vm in app.domains:
-            frontends = _load_frontends_info(vm, dev, devclass, actual_devices)
-            result[dev].frontends.extend(frontends)
+    if not result or not with_frontends:
+        return result
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=LIST_WORKERS
+    ) as executor:
+        # `map` keeps order of qubes, so frontends are listed in stable order
+        futures = executor.map(
+            lambda vm: _load_vm_frontends(vm, result, devclass, actual_devices),
+            app.domains,
+        )
+        for vm_frontends in futures:
+            for dev, frontend in vm_frontends:
+                result[dev].frontends.append(frontend)
     return result
 
 
@@ -153,20 +172,18 @@ def _load_devices(app, domains, devclass, actual_devices):
         ignore_errors = True
         domains = app.domains
     try:
-        for vm in domains:
-            try:
-                if actual_devices:
-                    for ass in vm.devices[devclass].get_attached_devices():
-                        devices.add(ass.device)
-                    for dev in vm.devices[devclass].get_exposed_devices():
-                        devices.add(dev)
-                else:
-                    for ass in vm.devices[devclass].get_assigned_devices():
-                        devices.add(ass.virtual_device)
-            except qubesadmin.exc.QubesVMNotFoundError:
-                if ignore_errors:
-                    continue
-                raise
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=LIST_WORKERS
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _collect_devices, vm, devclass, actual_devices,
+                    ignore_errors
+                )
+                for vm in domains
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                devices.update(future.result())
     except qubesadmin.exc.QubesDaemonAccessError:
         raise qubesadmin.exc.QubesException(
             "Failed to list '%s' devices, this device type either "
@@ -176,24 +193,55 @@ def _load_devices(app, domains, devclass, actual_devices):
     return devices
 
 
-def _load_frontends_info(vm, dev, devclass, actual_devices):
+def _collect_devices(vm, devclass, actual_devices, ignore_errors):
     """
-    Returns string of vms to which a device is connected or `None`.
+    Returns list of devices exposed by or connected to a single domain.
+
+    Run in a worker thread by :py:func:`_load_devices`.
     """
-    if vm == dev.backend_domain:
-        return
+    devices = []
+    collection = vm.devices[devclass]
+    try:
+        if actual_devices:
+            devices.extend(
+                ass.device for ass in collection.get_attached_devices()
+            )
+            devices.extend(collection.get_exposed_devices())
+        else:
+            devices.extend(
+                ass.virtual_device for ass in collection.get_assigned_devices()
+            )
+    except qubesadmin.exc.QubesVMNotFoundError:
+        if not ignore_errors:
+            raise
+    return devices
+
+
+def _load_vm_frontends(vm, devices, devclass, actual_devices):
+    """
+    Returns list of `(device, frontend description)` pairs for given domain.
 
+    Assignments of the domain are listed only once and then matched against
+    all `devices`. Run in a worker thread by :py:func:`_load_lines`.
+    """
+    frontends = []
+    collection = vm.devices[devclass]
     try:
         if actual_devices:
-            for assignment in vm.devices[devclass].get_attached_devices():
-                if dev in assignment.devices:
-                    yield _frontend_desc(vm, assignment)
+            for assignment in collection.get_attached_devices():
+                for dev in assignment.devices:
+                    if dev in devices and vm != dev.backend_domain:
+                        frontends.append((dev, _frontend_desc(vm, assignment)))
         else:
-            for assignment in vm.devices[devclass].get_assigned_devices():
-                if assignment.matches(dev):
-                    yield _frontend_desc(vm, assignment, virtual=True)
+            for assignment in collection.get_assigned_devices():
+                for dev in devices:
+                    if vm != dev.backend_domain and assignment.matches(dev):
+                        frontends.append(
+                            (dev, _frontend_desc(vm, assignment, virtual=True))
+                        )
     except qubesadmin.exc.QubesVMNotFoundError:
         pass
+    return frontends
 
 
 def _frontend_desc(vm, assignment, virtual=False):
@@ -226,7 +274,7 @@ def attach_device(args):
         # backward compatibility
         mode="required" if args.required else "manual",
     )
-    options = dict(opt.split("=", 1) for opt in args.option or [])
+    options = _parse_options(args.option)
     if args.ro:
         options["read-only"] = "yes"
     parse_ro_option_as_read_only(options)
@@ -262,6 +310,21 @@ def attach_device(args):
         vm.devices[args.devclass].assign(assignment)
 
 
+def _parse_options(options):
+    """
+    Convert list of `opt=value` strings given with `--option` to a dict.
+    """
+    result = {}
+    for opt in options or ():
+        key, sep, value = opt.partition("=")
+        if not sep:
+            raise qubesadmin.exc.QubesValueError(
+                f"Invalid option {opt!r}, expected opt=value"
+            )
+        result[key] = value
+    return result
+
+
 def parse_ro_option_as_read_only(options):
     """
     For backward compatibility.
@@ -331,7 +394,7 @@ def assign_device(args):
         device = device.clone(
             port=Port(device.backend_domain, "*", device.devclass)
         )
-    options = dict(opt.split("=", 1) for opt in args.option or [])
+    options = _parse_options(args.option)
     if args.ro:
         options["read-only"] = "yes"
     parse_ro_option_as_read_only(options)
@@ -463,6 +526,14 @@ def init_list_parser(sub_parsers):
         "indicated by '*' before qube name.",
     )
 
+    list_parser.add_argument(
+        "--no-used-by",
+        action="store_true",
+        default=False,
+        help="Do not check which qubes the devices are attached or assigned "
+        "to (leave USED BY column empty), which is faster",
+    )
+
     list_parser.add_argument(
         "--with-sbdf",
         "--resolve-paths",
@@ -480,6 +551,57 @@ def init_list_parser(sub_parsers):
     list_parser.set_defaults(func=list_devices)
 
 
+def _make_device_resolver(allow_unknown, only_port):
+    """Return a function resolving a BACKEND:PORT_ID[:DEVICE_ID] string.
+
+    The returned function has *allow_unknown* and *only_port* bound, so
+    the checks don't need to look them up on the action for each call.
+    It takes ``(parser, app, devclass, representation)`` and returns
+    the :py:class:`qubesadmin.device_protocol.VirtualDevice`.
+    """
+
+    def resolve(parser, app, devclass, representation):
+        backend_name, sep, identity = representation.partition(":")
+        if not sep:
+            parser.error(
+                "expected a backend vm, port id and [optional] device id "
+                f"combination like foo:bar[:baz] got {representation}"
+            )
+        backend = app.domains.get(backend_name)
+        if backend is None:
+            parser.error_runtime("no such backend vm!")
+            return None
+        dev = VirtualDevice.from_str(
+            identity, devclass, app.domains, backend=backend
+        )
+
+        try:
+            # load device info; it is cached by the backend's device
+            # collection, so later lookups (for example when resolving
+            # the assignment) don't query qubesd again
+            _dev = backend.devices[devclass][dev.port_id]
+            if not dev.is_device_id_set or dev.device_id == _dev.device_id:
+                dev = _dev
+            elif only_port:
+                parser.error_runtime(
+                    "this option works only for explicitly given port ID "
+                    "and does not support device ID"
+                )
+            else:
+                dev = UnknownDevice.from_device(dev)
+            if not allow_unknown and isinstance(dev, UnknownDevice):
+                raise KeyError(dev.port_id)
+        except KeyError:
+            parser.error_runtime(
+                f"backend vm {dev.backend_name} doesn't expose "
+                f"{devclass} device {dev.port_id!r}"
+            )
+            dev = UnknownDevice.from_device(dev)
+        return dev
+
+    return resolve
+
+
 class DeviceAction(qubesadmin.tools.QubesAction):
     """Action for argument parser that gets the
     :py:class:``qubesadmin.device_protocol.VirtualDevice`` from a
@@ -497,6 +619,7 @@ class DeviceAction(qubesadmin.tools.QubesAction):
         # pylint: disable=redefined-builtin
         self.allow_unknown = allow_unknown
         self.only_port = only_port
+        self._resolve = _make_device_resolver(allow_unknown, only_port)
         super().__init__(help=help, required=required, **kwargs)
 
     def __call__(self, parser, namespace, values, option_string=None):
@@ -504,53 +627,27 @@ class DeviceAction(qubesadmin.tools.QubesAction):
         setattr(namespace, self.dest, values)
 
     def parse_qubes_app(self, parser, namespace):
-        app = namespace.app
         representation = getattr(namespace, self.dest)
-        devclass = namespace.devclass
         if representation is None:
             return
+        dev = self._resolve(
+            parser, namespace.app, namespace.devclass, representation
+        )
+        setattr(namespace, self.dest, dev)
 
-        try:
-            try:
-                dev = VirtualDevice.from_str(
-                    representation, devclass, app.domains
-                )
-            except KeyError:
-                parser.error_runtime("no such backend vm!")
-                return
-
-            try:
-                # load device info
-                _dev = dev.backend_domain.devices[devclass][dev.port_id]
-                if not dev.is_device_id_set or dev.device_id == _dev.device_id:
-                    dev = _dev
-                elif self.only_port:
-                    parser.error_runtime(
-                        "this option works only for explicitly given port ID "
-                        "and does not support device ID"
-                    )
-                else:
-                    dev = UnknownDevice.from_device(dev)
-                if not self.allow_unknown and isinstance(dev, UnknownDevice):
-                    raise KeyError(dev.port_id)
-            except KeyError:
-                parser.error_runtime(
-                    f"backend vm {dev.backend_name} doesn't expose "
-                    f"{devclass} device {dev.port_id!r}"
-                )
-                dev = UnknownDevice.from_device(dev)
-            setattr(namespace, self.dest, dev)
-        except ValueError:
-            parser.error(
-                "expected a backend vm, port id and [optional] device id "
-                f"combination like foo:bar[:baz] got {representation}"
-            )
+
+#: parsers created by :py:func:`get_parser`, by device class
+_PARSER_CACHE = {}
 
 
 def get_parser(device_class=None):
     """Create :py:class:`argparse.ArgumentParser` suitable for
     :program:`qvm-block`.
+
+    The parser is created once per device class and reused afterwards.
     """
+    if device_class in _PARSER_CACHE:
+        return _PARSER_CACHE[device_class]
     parser = qubesadmin.tools.QubesArgumentParser(description=__doc__)
     parser.register(
         "action", "parsers", qubesadmin.tools.AliasedSubParsersAction
@@ -726,6 +823,7 @@ def get_parser(device_class=None):
         "--list-device-classes", action="store_true", default=False
     )
 
+    _PARSER_CACHE[device_class] = parser
     return parser
 
 